@@ -1,21 +1,80 @@
 from ultralytics import YOLO
 import cv2
+import torch
 import numpy as np
-import matplotlib.pyplot as plt
-import time
 import os
-from collections import deque
+import functools
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+log = logging.getLogger(__name__)
 
 # Load your custom model
 model_path = 'Model/best (5).pt'  
+# Prefer the TensorRT engine built by Model/export_engine.py when present
+engine_path = os.path.splitext(model_path)[0] + '.engine'
+USE_ENGINE = os.path.exists(engine_path)
+if USE_ENGINE:
+    model_path = engine_path
 model = YOLO(model_path)
 print("Model loaded successfully!")
 
+# Run in FP16 on the GPU; CPU-only machines stay in FP32
+DEVICE = 0 if torch.cuda.is_available() else 'cpu'
+HALF = DEVICE != 'cpu'
+if HALF and not USE_ENGINE:  # engine precision is fixed at export time
+    model.to('cuda').half()
+IMG_SIZE = (480, 640)  # native capture shape (h, w), avoids letterboxing to 640x640
+
+# Resolve the class ids we care about once instead of comparing names per box
+CLASS_IDS = {name: idx for idx, name in model.names.items()}
+EYE_ID = CLASS_IDS['Eyes_closed']
+YAWN_ID = CLASS_IDS['Yawning']
+
+# Frames per YOLO call - batching amortizes the per-call pre/postprocess and launch overhead
+BATCH = 4
+FRAME_SIZE = (640, 480)  # (width, height) every batched frame is resized to
+
+# Temporal frame skipping: a batch whose frames barely change reuses the last detection
+MOTION_SIZE = (80, 60)     # thumbnail used for the frame difference
+MOTION_THRESHOLD = 3.0     # mean absolute pixel difference counted as "still"
+MOTION_MAX_SKIP = 5        # always run YOLO at least this often (in frames)
+
+# Input shape is fixed, so cuDNN can autotune its kernels once and reuse them
+if DEVICE != 'cpu':
+    torch.backends.cudnn.benchmark = True
+
+# Inference call with the per-frame settings baked in
+predict = functools.partial(model.predict, conf=0.4, half=HALF, device=DEVICE,
+                            imgsz=IMG_SIZE, verbose=False)
+
+# Warm up on a dummy batch so the first live frames don't pay the setup/autotune cost
+predict([np.zeros((IMG_SIZE[0], IMG_SIZE[1], 3), dtype=np.uint8)] * BATCH)
+
+WINDOW_NAME = 'Fatigue Monitoring'
+LEVEL_COLORS = {  # BGR
+    "VERY TIRED": (0, 0, 255),
+    "GETTING TIRED": (0, 165, 255),
+    "NORMAL": (0, 200, 0),
+}
+
 class FatigueCalculator:
     def __init__(self, frame_rate=30):
         self.frame_rate = frame_rate
-        self.eye_states = deque(maxlen=180 * frame_rate) 
-        self.yawn_states = deque(maxlen=180 * frame_rate)
+        # 3-minute window as preallocated ring buffers (one uint8 per frame)
+        window_frames = 180 * frame_rate
+        self.eye_buf = np.zeros(window_frames, dtype=np.uint8)
+        self.yawn_buf = np.zeros(window_frames, dtype=np.uint8)
+        self.yawn_start_buf = np.zeros(window_frames, dtype=np.uint8)  # 1 where a yawn event began
+        self.head = 0        # next slot to write
+        self.window_len = 0  # number of filled slots
+
+        # Running window totals, updated in O(1) per frame
+        self._eye_sum = 0
+        self._yawn_sum = 0
+        self._yawn_starts = 0
+        self._prev_yawn = False
         self.consecutive_eye_closed = 0
         
         # Paper thresholds
@@ -29,8 +88,20 @@ class FatigueCalculator:
     
     def update_metrics(self, eye_closed, yawning, detected_classes=None):
         """Update PERCLOS and FOM calculations"""
-        self.eye_states.append(eye_closed)
-        self.yawn_states.append(yawning)
+        slot = self.head
+        yawn_start = yawning and not self._prev_yawn
+
+        # Drop the evicted frame from the running totals (unfilled slots are zero)
+        self._eye_sum += int(eye_closed) - int(self.eye_buf[slot])
+        self._yawn_sum += int(yawning) - int(self.yawn_buf[slot])
+        self._yawn_starts += int(yawn_start) - int(self.yawn_start_buf[slot])
+
+        self.eye_buf[slot] = eye_closed
+        self.yawn_buf[slot] = yawning
+        self.yawn_start_buf[slot] = yawn_start
+        self._prev_yawn = yawning
+        self.head = (slot + 1) % self.eye_buf.size
+        self.window_len = min(self.window_len + 1, self.eye_buf.size)
         
         # Track consecutive eye closure
         if eye_closed:
@@ -43,50 +114,44 @@ class FatigueCalculator:
             'current_eye_closed': eye_closed,
             'current_yawning': yawning,
             'consecutive_frames': self.consecutive_eye_closed,
-            'total_eye_frames': sum(self.eye_states),
-            'total_yawn_frames': sum(self.yawn_states),
-            'window_size': len(self.eye_states),
+            'total_eye_frames': self._eye_sum,
+            'total_yawn_frames': self._yawn_sum,
+            'window_size': self.window_len,
             'detected_classes': detected_classes or []
         }
         
         # Debug output
-        print(f"EYE DEBUG: closed={eye_closed}, consecutive={self.consecutive_eye_closed}")
-        if detected_classes:
-            print(f"YOLO DETECTIONS: {detected_classes}")
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("EYE DEBUG: closed=%s, consecutive=%d", eye_closed, self.consecutive_eye_closed)
+            if detected_classes:
+                log.debug("YOLO DETECTIONS: %s", detected_classes)
     
     def calculate_perclos(self):
         """Calculate PERCLOS over the window"""
-        if len(self.eye_states) == 0:
+        if self.window_len == 0:
             return 0.0
-        return sum(self.eye_states) / len(self.eye_states)
+        return self._eye_sum / self.window_len
     
 
     def calculate_fom(self):
         """Better FOM that doesn't overcount continuous yawns"""
-        if len(self.yawn_states) < 30:
+        if self.window_len < 30:
             return 0.0
         
-        # Count yawn EVENTS with minimum duration between them
-        yawn_events = 0
-        consecutive_yawn_frames = 0
-        prev_was_yawn = False
-        
-        for current_yawn in self.yawn_states:
-            if current_yawn:
-                consecutive_yawn_frames += 1
-                if not prev_was_yawn:
-                    # Start of new yawn event
-                    yawn_events += 1
-            else:
-                consecutive_yawn_frames = 0
-                
-            prev_was_yawn = current_yawn
+        # Count yawn EVENTS (start of each continuous yawn) in the window.
+        # A yawn already in progress at the oldest frame counts as an event
+        # even though it started before the window.
+        oldest = (self.head - self.window_len) % self.yawn_buf.size
+        yawn_events = (self._yawn_starts
+                       + int(self.yawn_buf[oldest]) - int(self.yawn_start_buf[oldest]))
         
         # Ensure reasonable time window (minimum 10 seconds)
-        window_seconds = max(len(self.yawn_states) / self.frame_rate, 10.0)
+        window_seconds = max(self.window_len / self.frame_rate, 10.0)
         fom_per_minute = (yawn_events / window_seconds) * 60
         
-        print(f"FOM DEBUG: {yawn_events} yawn events in {window_seconds:.1f}s = {fom_per_minute:.2f} yawns/min")
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("FOM DEBUG: %d yawn events in %.1fs = %.2f yawns/min",
+                      yawn_events, window_seconds, fom_per_minute)
         return fom_per_minute
 
 
@@ -95,10 +160,16 @@ class FatigueCalculator:
         return self.consecutive_eye_closed / self.frame_rate
     
     def calculate_fatigue_level(self):
-        """Calculate fatigue level based on paper's rules"""
+        """Calculate fatigue level based on paper's rules.
+        
+        Returns (level, score, message, metrics); metrics holds the PERCLOS,
+        FOM and continuous closure values the level was computed from, so
+        callers can display them without recomputing.
+        """
         perclos = self.calculate_perclos()
         fom = self.calculate_fom()
         continuous_closure = self.get_continuous_eye_closure()
+        metrics = {'perclos': perclos, 'fom': fom, 'continuous_closure': continuous_closure}
         
         # Add hysteresis - once you enter a level, harder to leave it
         if hasattr(self, 'current_level'):
@@ -116,39 +187,60 @@ class FatigueCalculator:
             self.current_level = "NORMAL"
 
         # Debug the calculations
-        print(f"DEBUG: PERCLOS={perclos:.3f}, FOM={fom:.3f}, Continuous={continuous_closure:.1f}s")
-        print(f"DEBUG: Eye frames: {self.debug_info['total_eye_frames']}/{self.debug_info['window_size']}")
-        print(f"DEBUG: Yawn frames: {self.debug_info['total_yawn_frames']}/{self.debug_info['window_size']}")
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("PERCLOS=%.3f, FOM=%.3f, Continuous=%.1fs", perclos, fom, continuous_closure)
+            log.debug("Eye frames: %d/%d", self.debug_info['total_eye_frames'], self.debug_info['window_size'])
+            log.debug("Yawn frames: %d/%d", self.debug_info['total_yawn_frames'], self.debug_info['window_size'])
 
         # Level 1: Very Tired - Pathway A (Critical)
         if continuous_closure >= self.EYE_CLOSURE_CRITICAL:
-            print("🚨 CRITICAL ALERT TRIGGERED!")
-            return "VERY TIRED", 90, f"CRITICAL: Eyes closed {continuous_closure:.1f}s!"
+            log.warning("🚨 CRITICAL ALERT TRIGGERED!")
+            return "VERY TIRED", 90, f"CRITICAL: Eyes closed {continuous_closure:.1f}s!", metrics
         
         # Level 1: Very Tired - Pathway B (Combined)
         if perclos > self.PERCLOS_VERY_TIRED or fom > self.FOM_THRESHOLD:
-            return "VERY TIRED", 75, "High fatigue detected"
+            return "VERY TIRED", 75, "High fatigue detected", metrics
         
         # Level 2: Getting Tired
         if (self.PERCLOS_GETTING_TIRED <= perclos <= self.PERCLOS_VERY_TIRED) or fom > self.FOM_THRESHOLD:
-            return "GETTING TIRED", 50, "Early fatigue signs"
+            return "GETTING TIRED", 50, "Early fatigue signs", metrics
         
         # Level 3: Normal
-        return "NORMAL", 25, "No fatigue detected"
+        return "NORMAL", 25, "No fatigue detected", metrics
 
 def simple_mar_calculation(face_region):
     """More conservative MAR calculation"""
-    try:
-        gray = cv2.cvtColor(face_region, cv2.COLOR_BGR2GRAY)
-        mouth_region = gray[gray.shape[0]//2:, :]
-        mouth_contrast = np.std(mouth_region)
+    if face_region is None or face_region.size == 0:
+        return False
+    
+    # Green plane of the bottom half as a luminance proxy (a view, no gray conversion)
+    mouth_region = face_region[face_region.shape[0]//2:, :, 1]
+    mouth_contrast = np.std(mouth_region)
+    
+    # MUCH more conservative threshold
+    mar = min(mouth_contrast / 50.0, 1.0)  # Increased denominator
+    
+    return mar > 0.8  # Increased threshold - only obvious yawns
+
+def extract_detections(result):
+    """Extract eye-closed / yawning flags from a single YOLO result"""
+    eye_closed = False
+    yawning = False
+    detected_classes = []
+
+    if result.boxes is not None:
+        boxes = result.boxes
+        cls = boxes.cls.to(torch.int32)
+        confident = cls[boxes.conf > 0.4]
         
-        # MUCH more conservative threshold
-        mar = min(mouth_contrast / 50.0, 1.0)  # Increased denominator
+        # Reduce on the device and copy back just the two flags (a single sync)
+        flags = torch.stack([(confident == EYE_ID).any(), (confident == YAWN_ID).any()])
+        eye_closed, yawning = flags.cpu().tolist()
         
-        return mar > 0.8  # Increased threshold - only obvious yawns
-    except:
-        return False
+        if log.isEnabledFor(logging.DEBUG):
+            detected_classes = [result.names[i] for i in cls.tolist()]
+    
+    return eye_closed, yawning, detected_classes
 
 def test_critical_alert():
     """Test if critical eye closure alert works"""
@@ -160,7 +252,7 @@ def test_critical_alert():
     # Simulate 6 seconds of eye closure (60 frames at 10 FPS)
     for i in range(60):
         test_calc.update_metrics(eye_closed=True, yawning=False, detected_classes=["Eyes_closed"])
-        level, score, msg = test_calc.calculate_fatigue_level()
+        level, score, msg, _ = test_calc.calculate_fatigue_level()
         if level == "VERY TIRED" and score == 90:
             print(f"✅ CRITICAL ALERT WORKED: {msg}")
             return True
@@ -175,103 +267,156 @@ def live_monitoring():
     cap = cv2.VideoCapture(0)
     cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
     cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
+    cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)  # don't let the driver queue stale frames
     
     fatigue_calc = FatigueCalculator()
     
-    # Matplotlib setup for popup window
-    plt.ion()
-    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(15, 6))
+    # OpenCV window for the live feed; metrics are drawn onto the frame itself
+    cv2.namedWindow(WINDOW_NAME, cv2.WINDOW_NORMAL)
     
-    # Left: Camera feed
-    img_display = ax1.imshow(np.zeros((480, 640, 3), dtype=np.uint8))
-    ax1.axis('off')
-    ax1.set_title('Live Camera Feed')
+    # Capture, inference and display run concurrently. Each stage hands its
+    # newest output to the next through a one-element slot, so a slow stage
+    # drops frames instead of building up a backlog.
+    stop_event = threading.Event()
+    cap_lock = threading.Lock()
+    cap_slot = [None]
+    infer_lock = threading.Lock()
+    infer_slot = [None]
     
-    # Right: Fatigue metrics
-    ax2.axis('off')
-    ax2.set_title('Fatigue Analysis', fontsize=16, weight='bold')
-    
-    # Text elements for metrics
-    metrics_text = ax2.text(0.1, 0.9, "", transform=ax2.transAxes, fontsize=12, 
-                           verticalalignment='top', fontfamily='monospace')
-    alert_text = ax2.text(0.5, 0.5, "", transform=ax2.transAxes, fontsize=16, 
-                         weight='bold', ha='center', color='green')
-    
-    try:
-        frame_count = 0
-        while plt.fignum_exists(fig.number):
+    def capture_loop():
+        while not stop_event.is_set():
+            # This thread is always waiting on the camera, so with a 1-frame
+            # driver buffer each read is already the freshest frame
             ret, frame = cap.read()
             if not ret:
+                print("Failed to grab frame")
+                stop_event.set()
                 break
             
-            # Run YOLO inference
-            results = model(frame, conf=0.4)
-            annotated_frame = results[0].plot()
-            
-            # Extract detections for fatigue calculation
-            eye_closed = False
-            yawning = False
-            detected_classes = []
-
-            if results[0].boxes is not None:
-                classes = results[0].boxes.cls.cpu().numpy()
-                confidences = results[0].boxes.conf.cpu().numpy()
-                detected_classes = [results[0].names[int(cls)] for cls in classes]
+            # Uniform frame shape so Ultralytics stacks the batch into one tensor
+            if frame.shape[1::-1] != FRAME_SIZE:
+                frame = cv2.resize(frame, FRAME_SIZE)
+            with cap_lock:
+                cap_slot[0] = frame
+    
+    def inference_loop():
+        try:
+            frame_count = 0
+            frame_buffer = []
+            prev_small = None
+            batch_motion = 0.0
+            last_infer_frame = 0
+            last_result = None
+            last_detection = None
+            while not stop_event.is_set():
+                with cap_lock:
+                    frame = cap_slot[0]
+                    cap_slot[0] = None
+                if frame is None:
+                    stop_event.wait(0.005)
+                    continue
                 
-                for cls, conf in zip(classes, confidences):
-                    class_name = results[0].names[int(cls)]
+                # Cheap motion estimate against the previous frame on a thumbnail
+                small = cv2.resize(frame, MOTION_SIZE)
+                if prev_small is not None:
+                    batch_motion = max(batch_motion, cv2.absdiff(small, prev_small).mean())
+                prev_small = small
+                
+                frame_buffer.append(frame)
+                if len(frame_buffer) < BATCH:
+                    continue
+                
+                # Skip YOLO for a still batch and reuse the last detection, but
+                # never for longer than MOTION_MAX_SKIP frames
+                if (last_result is not None and batch_motion < MOTION_THRESHOLD
+                        and frame_count - last_infer_frame < MOTION_MAX_SKIP):
+                    detections = [last_detection] * BATCH
+                else:
+                    # Run YOLO inference on the whole batch
+                    results = predict(frame_buffer)
                     
-                    if class_name == 'Eyes_closed' and conf > 0.4:
-                        eye_closed = True
-                    elif class_name == 'Yawning' and conf > 0.4:
-                        yawning = True
-            
-            # Update fatigue metrics with detected classes for debugging
-            fatigue_calc.update_metrics(eye_closed, yawning, detected_classes)
-            level, score, alert_msg = fatigue_calc.calculate_fatigue_level()
-            
-            # Update display
-            rgb_frame = cv2.cvtColor(annotated_frame, cv2.COLOR_BGR2RGB)
-            img_display.set_data(rgb_frame)
-            
-            # Update metrics text
-            metrics_str = f"""
-FATIGUE LEVEL: {level}
-SCORE: {score}/100
-PERCLOS: {fatigue_calc.calculate_perclos():.3f}
-FOM: {fatigue_calc.calculate_fom():.3f}
-Continuous Eye Closure: {fatigue_calc.get_continuous_eye_closure():.1f}s
-Frame: {frame_count}
-            """
-            metrics_text.set_text(metrics_str)
-            
-            # Update alert with color coding
-            if level == "VERY TIRED":
-                alert_text.set_text("🚨 " + alert_msg)
-                alert_text.set_color('red')
-                ax2.set_facecolor('#FFE6E6')  # Light red background
-            elif level == "GETTING TIRED":
-                alert_text.set_text("⚠️ " + alert_msg)
-                alert_text.set_color('orange')
-                ax2.set_facecolor('#FFF4E6')  # Light orange background
-            else:
-                alert_text.set_text("✅ " + alert_msg)
-                alert_text.set_color('green')
-                ax2.set_facecolor('#E6FFE6')  # Light green background
-            
-            fig.canvas.draw()
-            fig.canvas.flush_events()
+                    # Postprocess the batch items concurrently (torch/NumPy release the GIL),
+                    # then apply them to the calculator in capture order
+                    detections = list(postprocess_pool.map(extract_detections, results))
+                    last_result = results[-1]
+                    last_detection = detections[-1]
+                    last_infer_frame = frame_count
+                latest_frame = frame_buffer[-1]
+                frame_buffer = []
+                batch_motion = 0.0
+                
+                for eye_closed, yawning, detected_classes in detections:
+                    fatigue_calc.update_metrics(eye_closed, yawning, detected_classes)
+                    level, score, alert_msg, metrics = fatigue_calc.calculate_fatigue_level()
+                
+                frame_count += BATCH
+                
+                # Only the latest frame of the batch is displayed; it is drawn
+                # by the display thread so plotting stays off the inference path.
+                # The frame travels with the result, which may be a reused one
+                # from an earlier (still) batch.
+                with infer_lock:
+                    infer_slot[0] = (latest_frame, last_result, level, score, alert_msg,
+                                     metrics, frame_count)
+        except Exception as e:
+            print(f"Inference error: {e}")
+            stop_event.set()
+    
+    postprocess_pool = ThreadPoolExecutor(max_workers=BATCH)
+    capture_thread = threading.Thread(target=capture_loop, daemon=True)
+    inference_thread = threading.Thread(target=inference_loop, daemon=True)
+    
+    try:
+        capture_thread.start()
+        inference_thread.start()
+        while not stop_event.is_set():
+            with infer_lock:
+                latest = infer_slot[0]
+                infer_slot[0] = None
+            if latest is not None:
+                frame, result, level, score, alert_msg, metrics, frame_count = latest
+                annotated_frame = result.plot(img=frame, line_width=1, labels=False)
+                color = LEVEL_COLORS.get(level, LEVEL_COLORS["NORMAL"])
+                
+                # Alert banner across the top, color coded by level
+                cv2.rectangle(annotated_frame, (0, 0), (annotated_frame.shape[1], 32), color, thickness=-1)
+                cv2.putText(annotated_frame, alert_msg, (10, 22), cv2.FONT_HERSHEY_SIMPLEX,
+                            0.6, (255, 255, 255), 2)
+                
+                # Metrics overlay (drawn straight onto the BGR frame, no RGB conversion)
+                metrics_lines = [
+                    f"FATIGUE LEVEL: {level}",
+                    f"SCORE: {score}/100",
+                    f"PERCLOS: {metrics['perclos']:.3f}",
+                    f"FOM: {metrics['fom']:.3f}",
+                    f"Continuous Eye Closure: {metrics['continuous_closure']:.1f}s",
+                    f"Frame: {frame_count}",
+                ]
+                for i, line in enumerate(metrics_lines):
+                    cv2.putText(annotated_frame, line, (10, 56 + 20 * i), cv2.FONT_HERSHEY_SIMPLEX,
+                                0.5, color, 1)
+                
+                cv2.imshow(WINDOW_NAME, annotated_frame)
             
-            frame_count += 1
-            time.sleep(0.03)
+            # Pump window events; 'q' or closing the window stops monitoring
+            if cv2.waitKey(1) & 0xFF == ord('q'):
+                break
+            if cv2.getWindowProperty(WINDOW_NAME, cv2.WND_PROP_VISIBLE) < 1:
+                break
             
     except Exception as e:
         print(f"Error: {e}")
     finally:
-        plt.ioff()
+        # Stop the workers before releasing the camera they read from
+        stop_event.set()
+        for thread in (capture_thread, inference_thread):
+            if thread.is_alive():
+                thread.join(timeout=2.0)
+        postprocess_pool.shutdown(wait=False)
         cap.release()
-        plt.close()
+        cv2.destroyAllWindows()
         print("Monitoring stopped")
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
     live_monitoring()
\ No newline at end of file
@@ -0,0 +1,32 @@
+from ultralytics import YOLO
+import sys
+import os
+
+# One-time export of the PyTorch weights to a TensorRT engine.
+# The engine is tied to the GPU and TensorRT version it was built with,
+# so run this on the machine that will do the live monitoring.
+#
+#   python Model/export_engine.py "Model/best (5).pt"
+#   python Model/export_engine.py "Model/best (5).pt" calib.yaml   # INT8
+#
+# INT8 needs a dataset yaml pointing at 100-300 representative face frames
+# for calibration. Without it the engine is built in FP16.
+
+# Must match BATCH / IMG_SIZE in the live monitoring scripts - the engine has a fixed input shape
+BATCH = 4
+IMG_SIZE = (480, 640)
+
+weights_path = sys.argv[1] if len(sys.argv) > 1 else 'Model/best (5).pt'
+calib_data = sys.argv[2] if len(sys.argv) > 2 else None
+
+if not os.path.exists(weights_path):
+    print(f"Error: Model file not found: {weights_path}")
+    exit(1)
+
+model = YOLO(weights_path)
+if calib_data:
+    engine_path = model.export(format='engine', int8=True, data=calib_data,
+                               imgsz=IMG_SIZE, batch=BATCH)
+else:
+    engine_path = model.export(format='engine', half=True, imgsz=IMG_SIZE, batch=BATCH)
+print(f"Engine written to: {engine_path}")
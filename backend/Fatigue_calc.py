@@ -1,4 +1,32 @@
 import time
+import logging
+import numpy as np
+
+log = logging.getLogger(__name__)
+
+# Sleep hours -> fatigue contribution as a step function: below 4h -> 0.9,
+# [4, 5) -> 0.7, ... , 8h and up -> 0.0
+_SLEEP_X = np.array([4, 5, 6, 7, 8])
+_SLEEP_Y = np.array([0.9, 0.7, 0.5, 0.3, 0.1, 0.0])
+
+# Equation weights and normalization caps, in factor order:
+# PERCLOS, FOM, droopy eyelids, reaction time, voice, history, sleep
+_WEIGHTS = np.array([0.25, 0.20, 0.15, 0.15, 0.10, 0.10, 0.05])
+_CAPS = np.array([0.3, 0.2, 1.0, 1.0, 1.0, 1.0, 1.0])
+
+# Rule-based classification thresholds
+_EMERGENCY_EYE_CLOSURE_SEC = 10.0
+_PERCLOS_HIGH = 0.24
+_PERCLOS_EARLY = 0.15
+_FOM_HIGH = 0.16
+_DROOPY_HIGH = 0.8
+_DROOPY_EARLY = 0.5
+_SLEEP_CRITICAL_H = 2
+_SLEEP_LOW_H = 4
+_REACTION_CRITICAL_MS = 500
+_REACTION_SLOW_MS = 350
+_ALERTS_HIGH = 3
+
 class FatigueCalculator:
     def __init__(self):
         self.current_level = "NORMAL"
@@ -31,21 +59,23 @@ class FatigueCalculator:
         previous_alerts = self._get_previous_alerts_count()
 
         # STEP 1: Calculate equation-based score with BALANCED WEIGHTS
-        fatigue_score = (
-            0.25 * self._normalize_perclos(perclos) +           # PERCLOS (25%)
-            0.20 * self._normalize_fom(fom) +                   # FOM (20%)
-            0.15 * self._normalize_droopy(droopy_eyelids_frequency) + # Droopy eyelids (15%)
-            0.15 * reaction_score +                             # Reaction time (15%)
-            0.10 * voice_score +                                # Voice patterns (10%)
-            0.10 * history_score +                              # Historical data (10%)
-            0.05 * self._normalize_sleep(sleep_hours)           # Sleep quality (5%)
-        )
+        factors = np.array([
+            perclos,                              # PERCLOS (25%)
+            fom,                                  # FOM (20%)
+            droopy_eyelids_frequency,             # Droopy eyelids (15%)
+            reaction_score,                       # Reaction time (15%)
+            voice_score,                          # Voice patterns (10%)
+            history_score,                        # Historical data (10%)
+            self._normalize_sleep(sleep_hours)    # Sleep quality (5%)
+        ])
+        fatigue_score = float(_WEIGHTS @ np.minimum(factors / _CAPS, 1.0))
 
         # Debug info
-        print(f"DEBUG: PERCLOS={perclos:.3f}, FOM={fom:.3f}, EyeClosure={continuous_closure:.1f}s")
-        print(f"DEBUG: DroopyEyelids={droopy_eyelids_frequency:.3f}, Reaction={reaction_time_ms}ms")
-        print(f"DEBUG: Sleep={sleep_hours}h, PreviousAlerts={previous_alerts}")
-        print(f"DEBUG: EQUATION SCORE: {fatigue_score:.3f}")
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("PERCLOS=%.3f, FOM=%.3f, EyeClosure=%.1fs", perclos, fom, continuous_closure)
+            log.debug("DroopyEyelids=%.3f, Reaction=%dms", droopy_eyelids_frequency, reaction_time_ms)
+            log.debug("Sleep=%sh, PreviousAlerts=%d", sleep_hours, previous_alerts)
+            log.debug("EQUATION SCORE: %.3f", fatigue_score)
 
         # STEP 2: Apply rule-based classification
         rule_based_level = self._rule_based_classification(
@@ -53,7 +83,8 @@ class FatigueCalculator:
             sleep_hours, reaction_time_ms, previous_alerts
         )
         
-        print(f"DEBUG: RULE-BASED LEVEL: {rule_based_level}")
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("RULE-BASED LEVEL: %s", rule_based_level)
 
         # STEP 3: Hybrid decision with PERSISTENCE
         final_level, confidence = self._hybrid_decision_with_persistence(
@@ -73,18 +104,18 @@ class FatigueCalculator:
         """Rule-based classification with GRADUAL alert escalation"""
         
         # HIGH FATIGUE Rules (IMMEDIATE DANGER - no persistence needed)
-        if (eye_closure > 10.0 or                         # Emergency eye closure - immediate!
-            perclos > 0.24 or fom > 0.16 or               # Critical thresholds
-            droopy_eyelids > 0.8 or                       # Severe droopy eyelids
-            sleep < 2 or reaction_ms > 500 or             # Critical history factors
-            alerts >= 3):             
+        if (eye_closure > _EMERGENCY_EYE_CLOSURE_SEC or   # Emergency eye closure - immediate!
+            perclos > _PERCLOS_HIGH or fom > _FOM_HIGH or # Critical thresholds
+            droopy_eyelids > _DROOPY_HIGH or              # Severe droopy eyelids
+            sleep < _SLEEP_CRITICAL_H or reaction_ms > _REACTION_CRITICAL_MS or  # Critical history factors
+            alerts >= _ALERTS_HIGH):             
             return "HIGH FATIGUE"
     
         # EARLY FATIGUE Rules with GRADUAL escalation
-        elif ((0.15 <= perclos <= 0.24) or fom > 0.16 or  # Research paper early signs
-              droopy_eyelids > 0.5 or                     # Moderate droopy eyelids
-              (2 <= sleep < 4) or                         # Insufficient sleep
-              (350 < reaction_ms <= 500 or
+        elif ((_PERCLOS_EARLY <= perclos <= _PERCLOS_HIGH) or fom > _FOM_HIGH or  # Research paper early signs
+              droopy_eyelids > _DROOPY_EARLY or           # Moderate droopy eyelids
+              (_SLEEP_CRITICAL_H <= sleep < _SLEEP_LOW_H) or  # Insufficient sleep
+              (_REACTION_SLOW_MS < reaction_ms <= _REACTION_CRITICAL_MS or
                alerts >= 1 )):                # Impaired reaction
             return "EARLY FATIGUE"
         
@@ -120,7 +151,7 @@ class FatigueCalculator:
                 proposed_level = "NORMAL"
         
         # EMERGENCY OVERRIDE: Immediate escalation for critical safety issues
-        if eye_closure > 10.0 or rule_level == "HIGH FATIGUE":
+        if eye_closure > _EMERGENCY_EYE_CLOSURE_SEC or rule_level == "HIGH FATIGUE":
             self.current_stable_level = proposed_level
             self.level_persistence_timer = current_time
             return proposed_level, "HIGH"
@@ -181,28 +212,10 @@ class FatigueCalculator:
         else:
             return "NORMAL: All factors within safe limits"
     
-    # Normalization functions (adjusted for better balance)
-    def _normalize_perclos(self, perclos):
-        return min(perclos / 0.3, 1.0)
-    
-    def _normalize_fom(self, fom):
-        return min(fom / 0.2, 1.0)
-    
-    def _normalize_droopy(self, droopy_freq):
-        return min(droopy_freq / 1.0, 1.0)
-    
+    # Normalization functions (PERCLOS/FOM/droopy are capped via _CAPS)
     def _normalize_reaction_time(self, reaction_ms):
-        if reaction_ms <= 250:
-            return 0.0
-        elif reaction_ms >= 500:
-            return 1.0
-        else:
-            return (reaction_ms - 250) / 250.0
+        # 250ms -> 0.0 up to 500ms -> 1.0
+        return float(np.clip((reaction_ms - 250) / 250.0, 0.0, 1.0))
     
     def _normalize_sleep(self, sleep_hours):
-        if sleep_hours >= 8: return 0.0
-        elif sleep_hours >= 7: return 0.1
-        elif sleep_hours >= 6: return 0.3
-        elif sleep_hours >= 5: return 0.5
-        elif sleep_hours >= 4: return 0.7
-        else: return 0.9
\ No newline at end of file
+        return float(_SLEEP_Y[np.searchsorted(_SLEEP_X, sleep_hours, side='right')])
\ No newline at end of file
@@ -1,28 +1,56 @@
-from collections import deque
+import numpy as np
 
 class PhysioScore:
-    def __init__(self, frame_rate=30):
+    def __init__(self, frame_rate=30, debug_enabled=False):
         self.frame_rate = frame_rate
+        self.debug_enabled = debug_enabled  # include debug_info in get_physio_scores()
         # 30-second window for demo (instead of 3 minutes)
         window_seconds = 30
         window_frames = window_seconds * frame_rate
         
-        self.eye_states = deque(maxlen=window_frames) 
-        self.yawn_states = deque(maxlen=window_frames)
-        self.droopy_eyelids_states = deque(maxlen=window_frames)
-        self.droopy_face_states = deque(maxlen=window_frames)
+        # Preallocated ring buffers (one uint8 per frame) with running totals
+        self.eye_buf = np.zeros(window_frames, dtype=np.uint8)
+        self.yawn_buf = np.zeros(window_frames, dtype=np.uint8)
+        self.yawn_start_buf = np.zeros(window_frames, dtype=np.uint8)  # 1 where a yawn event began
+        self.droopy_eyelids_buf = np.zeros(window_frames, dtype=np.uint8)
+        self.droopy_face_buf = np.zeros(window_frames, dtype=np.uint8)
+        self.head = 0        # next slot to write
+        self.window_len = 0  # number of filled slots
+        
+        self.eye_sum = 0
+        self.yawn_sum = 0
+        self.yawn_starts = 0
+        self.droopy_eyelids_sum = 0
+        self.droopy_face_sum = 0
+        self.prev_yawn = False
+        
         self.consecutive_eye_closed = 0
         self.consecutive_droopy_face = 0
         
-        # debug info
-        self.debug_info = {}
+        # Most recent per-frame detections (for debug_info)
+        self.current_states = (False, False, False, False)
     
     def update_vision_metrics(self, eye_closed, yawning, droopy_eyelids=False, droopy_face=False):
         """Update PERCLOS and FOM calculations"""
-        self.eye_states.append(eye_closed)
-        self.yawn_states.append(yawning)
-        self.droopy_eyelids_states.append(droopy_eyelids)
-        self.droopy_face_states.append(droopy_face)
+        slot = self.head
+        yawn_start = yawning and not self.prev_yawn
+        
+        # Swap the evicted frame for the new one in the running totals (unfilled slots are zero)
+        self.eye_sum += int(eye_closed) - int(self.eye_buf[slot])
+        self.yawn_sum += int(yawning) - int(self.yawn_buf[slot])
+        self.yawn_starts += int(yawn_start) - int(self.yawn_start_buf[slot])
+        self.droopy_eyelids_sum += int(droopy_eyelids) - int(self.droopy_eyelids_buf[slot])
+        self.droopy_face_sum += int(droopy_face) - int(self.droopy_face_buf[slot])
+        
+        self.eye_buf[slot] = eye_closed
+        self.yawn_buf[slot] = yawning
+        self.yawn_start_buf[slot] = yawn_start
+        self.droopy_eyelids_buf[slot] = droopy_eyelids
+        self.droopy_face_buf[slot] = droopy_face
+        self.prev_yawn = yawning
+        self.current_states = (eye_closed, yawning, droopy_eyelids, droopy_face)
+        self.head = (slot + 1) % self.eye_buf.size
+        self.window_len = min(self.window_len + 1, self.eye_buf.size)
         
         # Track consecutive eye closure
         if eye_closed:
@@ -35,44 +63,45 @@ class PhysioScore:
             self.consecutive_droopy_face += 1
         else:
             self.consecutive_droopy_face = 0
-
-        # debug info
-        self.debug_info = {
+    
+    @property
+    def debug_info(self):
+        """Debug snapshot, built on demand from the running totals"""
+        eye_closed, yawning, droopy_eyelids, droopy_face = self.current_states
+        return {
             'current_eye_closed': eye_closed,
             'current_yawning': yawning,
             'current_droopy_eyelids': droopy_eyelids,
             'current_droopy_face': droopy_face,
             'consecutive_frames': self.consecutive_eye_closed,
             'consecutive_droopy_face_frames': self.consecutive_droopy_face,
-            'total_eye_frames': sum(self.eye_states),
-            'total_yawn_frames': sum(self.yawn_states),
-            'total_droopy_eyelids_frames': sum(self.droopy_eyelids_states),
-            'total_droopy_face_frames': sum(self.droopy_face_states),
-            'window_size': len(self.eye_states)
+            'total_eye_frames': self.eye_sum,
+            'total_yawn_frames': self.yawn_sum,
+            'total_droopy_eyelids_frames': self.droopy_eyelids_sum,
+            'total_droopy_face_frames': self.droopy_face_sum,
+            'window_size': self.window_len
         }
     
     def calculate_perclos(self):
         """Calculate PERCLOS over the window"""
-        if len(self.eye_states) == 0:
+        if self.window_len == 0:
             return 0.0
-        return sum(self.eye_states) / len(self.eye_states)
+        return self.eye_sum / self.window_len
     
     def calculate_fom(self):
         """Calculate FOM over the window"""
-        if len(self.yawn_states) < 30:
+        if self.window_len < 30:
             return 0.0
         
-        # Count yawn EVENTS with minimum duration between them
-        yawn_events = 0
-        prev_was_yawn = False
-        
-        for current_yawn in self.yawn_states:
-            if current_yawn and not prev_was_yawn:
-                yawn_events += 1
-            prev_was_yawn = current_yawn
+        # Count yawn EVENTS (start of each continuous yawn) in the window.
+        # A yawn already in progress at the oldest frame counts as an event
+        # even though it started before the window.
+        oldest = (self.head - self.window_len) % self.yawn_buf.size
+        yawn_events = (self.yawn_starts
+                       + int(self.yawn_buf[oldest]) - int(self.yawn_start_buf[oldest]))
         
         # Ensure reasonable time window (minimum 10 seconds)
-        window_seconds = max(len(self.yawn_states) / self.frame_rate, 10.0)
+        window_seconds = max(self.window_len / self.frame_rate, 10.0)
         fom_per_minute = (yawn_events / window_seconds) * 60
         
         return fom_per_minute
@@ -87,24 +116,26 @@ class PhysioScore:
     
     def get_droopy_eyelids_frequency(self):
         """Get frequency of droopy eyelids"""
-        if len(self.droopy_eyelids_states) == 0:
+        if self.window_len == 0:
             return 0.0
-        return sum(self.droopy_eyelids_states) / len(self.droopy_eyelids_states)
+        return self.droopy_eyelids_sum / self.window_len
     
     def get_droopy_face_frequency(self):
         """Get frequency of droopy face"""
-        if len(self.droopy_face_states) == 0:
+        if self.window_len == 0:
             return 0.0
-        return sum(self.droopy_face_states) / len(self.droopy_face_states)
+        return self.droopy_face_sum / self.window_len
     
     def get_physio_scores(self):
         """Return all physiological scores"""
-        return {
+        scores = {
             'perclos': self.calculate_perclos(),
             'fom': self.calculate_fom(),
             'continuous_closure_sec': self.get_continuous_eye_closure(),
             'continuous_droopy_face_sec': self.get_continuous_droopy_face(),
             'droopy_eyelids_frequency': self.get_droopy_eyelids_frequency(),
-            'droopy_face_frequency': self.get_droopy_face_frequency(),
-            'debug_info': self.debug_info
-        }
\ No newline at end of file
+            'droopy_face_frequency': self.get_droopy_face_frequency()
+        }
+        if self.debug_enabled:
+            scores['debug_info'] = self.debug_info
+        return scores
\ No newline at end of file
@@ -1,164 +1,406 @@
 from ultralytics import YOLO
 import cv2
+import torch
 import numpy as np
-import matplotlib.pyplot as plt
 import time
 import os
+import sys
+import logging
+import queue
+import threading
 
-# Import our modules
-from Physio_score import PhysioScore
-from Fatigue_calc import FatigueCalculator
+# Import our modules - package-relative when imported as backend.main,
+# plain when run as a script from the backend directory
+try:
+    from .Physio_score import PhysioScore
+    from .Fatigue_calc import FatigueCalculator
+except ImportError:
+    from Physio_score import PhysioScore
+    from Fatigue_calc import FatigueCalculator
 
 # Load your custom model
-model_path = 'Model/best (5).pt'  
-model = YOLO(model_path)
-print("Model loaded successfully!")
-
-def extract_detections(results):
-    """Extract detections from YOLO results"""
-    eye_closed = False
-    yawning = False
-    droopy_eyelids = False
-    droopy_face = False
-    detected_classes = []
-
-    if results[0].boxes is not None:
-        classes = results[0].boxes.cls.cpu().numpy()
-        confidences = results[0].boxes.conf.cpu().numpy()
-        detected_classes = [results[0].names[int(cls)] for cls in classes]
-        
-        for cls, conf in zip(classes, confidences):
-            class_name = results[0].names[int(cls)]
-            
-            if class_name == 'Eyes_closed' and conf > 0.4:
-                eye_closed = True
-            elif class_name == 'Yawning' and conf > 0.4:
-                yawning = True
-            elif class_name == 'dropping eye lids' and conf > 0.3:
-                droopy_eyelids = True
-            elif class_name == 'dropping face' and conf > 0.3:
-                droopy_face = True
-    
-    return eye_closed, yawning, droopy_eyelids, droopy_face, detected_classes
-
-def live_monitoring():
-    cap = cv2.VideoCapture(0)
-    cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
+MODEL_PATH = 'Model/best (5).pt'
+DEVICE = 0 if torch.cuda.is_available() else 'cpu'
+HALF = DEVICE != 'cpu'
+IMG_SIZE = (480, 640)  # native capture shape (h, w) - no letterbox padding or CPU resize
+
+# Frames per YOLO call - batching amortizes per-call launch and H2D overhead
+FRAME_BATCH = 4
+TARGET_FPS = 30
+
+WINDOW_NAME = 'Fatigue Monitoring'
+TEXT_COLOR = (255, 255, 255)
+BOX_COLOR = (0, 255, 0)
+LEVEL_STYLES = {  # level: (banner tag, text color, banner color), BGR
+    "HIGH FATIGUE": ("[!!]", (0, 0, 255), (0, 0, 200)),
+    "EARLY FATIGUE": ("[!]", (0, 165, 255), (0, 140, 230)),
+    "NORMAL": ("[OK]", (0, 200, 0), (0, 150, 0)),
+    "CALIBRATING": ("[..]", (200, 200, 200), (90, 90, 90)),
+}
+BANNER_HEIGHT = 30
+BANNER_MIN_SCALE = 0.45  # below this the banner text wraps onto two lines
+PANEL_WIDTH = 360  # side panel width for the 'split' layout
+METRICS_EVERY = 6  # frames between metrics text refreshes (~5 Hz at TARGET_FPS)
+
+MOTION_SIZE = (32, 32)     # grayscale thumbnail used for the frame difference
+MOTION_THRESHOLD = 2.0     # mean absolute pixel difference counted as "still"
+MOTION_MAX_SKIP = 10       # always run YOLO at least this often (in frames)
+
+# Model singleton - loaded on first use by load_model(), so importing this
+# module (e.g. from Live_dashboard) doesn't load, export or compile anything
+model = None
+USE_ENGINE = False
+# Keyword arguments for every inference call; load_model() adds compile=
+# only once it has been shown to work
+PREDICT_KWARGS = dict(conf=0.4, imgsz=IMG_SIZE, half=HALF, device=DEVICE, verbose=False)
+
+# Class indices, resolved once from the loaded model
+IDX_EYES = IDX_YAWN = IDX_DROOPY_LIDS = IDX_DROOPY_FACE = None
+
+def load_model():
+    """Load the YOLO model once per process and resolve its class indices"""
+    global model, USE_ENGINE, IDX_EYES, IDX_YAWN, IDX_DROOPY_LIDS, IDX_DROOPY_FACE
+    if model is not None:
+        return model
     
-    physio = PhysioScore()
-    fatigue_calc = FatigueCalculator()
+    model_path = MODEL_PATH
+    # On a GPU, run a TensorRT FP16 engine built from the .pt weights on first start.
+    # The engine only works on the GPU/TensorRT version that built it - delete the
+    # .engine file to have it rebuilt after moving to another machine.
+    if DEVICE != 'cpu':
+        engine_path = os.path.splitext(model_path)[0] + '.engine'
+        if not os.path.exists(engine_path):
+            print("Exporting TensorRT engine (one-time, may take a few minutes)...")
+            try:
+                YOLO(model_path).export(format='engine', half=True, simplify=True, dynamic=True,
+                                        batch=8, imgsz=IMG_SIZE, device=DEVICE)
+            except Exception as e:
+                print(f"TensorRT export failed, using PyTorch weights: {e}")
+        if os.path.exists(engine_path):
+            model_path = engine_path
+    USE_ENGINE = model_path.endswith('.engine')
     
-    # Matplotlib setup with better layout
-    plt.ion()
-    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(16, 6))
+    model = YOLO(model_path)
+    print("Model loaded successfully!")
+    
+    # Without an engine on the GPU, let the predictor torch.compile its own
+    # network (the predict-time compile= argument, Ultralytics 8.4+). The
+    # warm-up runs a full FRAME_BATCH so the compiled graph matches the live
+    # batch shape and the first real batch doesn't recompile. This path no
+    # longer converts the network to channels_last.
+    if DEVICE != 'cpu' and not USE_ENGINE:
+        warmup = [np.zeros((IMG_SIZE[0], IMG_SIZE[1], 3), dtype=np.uint8)] * FRAME_BATCH
+        try:
+            with torch.inference_mode():
+                model(warmup, compile='reduce-overhead', **PREDICT_KWARGS)
+            PREDICT_KWARGS['compile'] = 'reduce-overhead'
+        except Exception as e:
+            # Older Ultralytics rejects the compile= argument; keep it out of
+            # every later call and rebuild the predictor without it
+            print(f"torch.compile unavailable, running uncompiled: {e}")
+            model.predictor = None
+    
+    name2idx = {name: idx for idx, name in model.names.items()}
+    IDX_EYES = name2idx['Eyes_closed']
+    IDX_YAWN = name2idx['Yawning']
+    IDX_DROOPY_LIDS = name2idx['dropping eye lids']
+    IDX_DROOPY_FACE = name2idx['dropping face']
+    return model
+
+def extract_detections(result):
+    """Extract detections from a single YOLO result"""
+    boxes = result.boxes
+    if boxes is None or len(boxes) == 0:
+        return False, False, False, False
+    
+    # Threshold and match classes on the device; only the four flags come back
+    cls = boxes.cls
+    conf = boxes.conf
+    flags = torch.stack([
+        ((cls == IDX_EYES) & (conf > 0.4)).any(),
+        ((cls == IDX_YAWN) & (conf > 0.4)).any(),
+        ((cls == IDX_DROOPY_LIDS) & (conf > 0.3)).any(),
+        ((cls == IDX_DROOPY_FACE) & (conf > 0.3)).any(),
+    ])
+    eye_closed, yawning, droopy_eyelids, droopy_face = flags.tolist()
+    
+    return eye_closed, yawning, droopy_eyelids, droopy_face
+
+def draw_boxes(frame, result):
+    """Draw detection boxes onto the frame in place (cheaper than Result.plot())"""
+    if result.boxes is not None:
+        # One host copy of all box corners
+        for x1, y1, x2, y2 in result.boxes.xyxy.int().tolist():
+            cv2.rectangle(frame, (x1, y1), (x2, y2), BOX_COLOR, 2)
+    return frame
+
+def put_latest(q, item):
+    """Put into a bounded queue, dropping the oldest entry when it is full"""
+    while True:
+        try:
+            q.put_nowait(item)
+            return
+        except queue.Full:
+            try:
+                q.get_nowait()
+            except queue.Empty:
+                pass
+
+def open_camera(index=0):
+    """Open the webcam with MJPG, 640x480 @ TARGET_FPS and a single-frame driver buffer"""
+    if sys.platform.startswith('win'):
+        api = cv2.CAP_DSHOW
+    elif sys.platform.startswith('linux'):
+        api = cv2.CAP_V4L2
+    else:
+        api = cv2.CAP_ANY
+    cap = cv2.VideoCapture(index, api)
+    # MJPG lets the camera compress on-device instead of streaming raw YUYV
+    cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'MJPG'))
+    cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
+    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
+    cap.set(cv2.CAP_PROP_FPS, TARGET_FPS)
+    cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)  # don't let the driver queue stale frames
+    return cap
+
+def _fit_scale(lines, max_width):
+    """Largest font scale (up to the normal 0.6) at which every line fits max_width"""
+    text_width = max(cv2.getTextSize(line, cv2.FONT_HERSHEY_SIMPLEX, 1.0, 2)[0][0]
+                     for line in lines)
+    return min(0.6, max_width / text_width)
+
+def render_banner(width, level, alert_msg):
+    """Draw the color coded alert banner strip for a level.
     
-    # Camera feed
-    img_display = ax1.imshow(np.zeros((480, 640, 3), dtype=np.uint8))
-    ax1.axis('off')
-    ax1.set_title('Live Camera Feed', fontsize=14, weight='bold')
+    Alerts are never truncated: the font shrinks to fit the strip, and a
+    message that would get too small is wrapped onto two lines instead.
+    """
+    tag, _, bg_color = LEVEL_STYLES.get(level, LEVEL_STYLES["NORMAL"])
+    banner = np.empty((BANNER_HEIGHT, width, 3), dtype=np.uint8)
+    banner[:] = bg_color
     
-    # Fatigue analysis panel - CLEAN LAYOUT
-    ax2.axis('off')
-    ax2.set_title('Fatigue Analysis', fontsize=16, weight='bold', pad=20)
+    text = f"{tag} {alert_msg}"
+    lines = [text]
+    scale = _fit_scale(lines, width - 20)
+    if scale < BANNER_MIN_SCALE:
+        words = text.split()
+        half = (len(words) + 1) // 2
+        lines = [" ".join(words[:half]), " ".join(words[half:])]
+        scale = min(_fit_scale(lines, width - 20), 0.5)  # two lines must share 30px
     
-    # Create separate text elements for different sections
-    status_text = ax2.text(0.05, 0.85, "", transform=ax2.transAxes, fontsize=14, 
-                          verticalalignment='top', fontfamily='monospace', weight='bold')
+    thickness = 2 if scale >= 0.5 else 1
+    baselines = (21,) if len(lines) == 1 else (13, 27)
+    for line, y in zip(lines, baselines):
+        cv2.putText(banner, line, (10, y), cv2.FONT_HERSHEY_SIMPLEX, scale, TEXT_COLOR, thickness)
+    return banner
+
+def format_metrics(level, score, physio_scores, alerts_count, frame_count):
+    """Format the metrics lines as (text, color) pairs"""
+    color = LEVEL_STYLES.get(level, LEVEL_STYLES["NORMAL"])[1]
+    return [
+        (f"FATIGUE LEVEL: {level}", color),
+        (f"SCORE: {score}/100", color),
+        (f"PERCLOS: {physio_scores['perclos']:.3f}", TEXT_COLOR),
+        (f"FOM: {physio_scores['fom']:.3f}", TEXT_COLOR),
+        (f"Droopy Eyelids: {physio_scores['droopy_eyelids_frequency']:.3f}", TEXT_COLOR),
+        (f"Eye Closure: {physio_scores['continuous_closure_sec']:.1f}s", TEXT_COLOR),
+        ("Reaction 0.85 | Voice 0.90 | History 0.80 | Sleep 6.5h", TEXT_COLOR),
+        (f"Alerts: {alerts_count}", TEXT_COLOR),
+        (f"Frame: {frame_count}", TEXT_COLOR),
+    ]
+
+def draw_metrics(image, lines, scale):
+    """Draw the metrics lines below the banner, one line per entry"""
+    for i, (line, line_color) in enumerate(lines):
+        cv2.putText(image, line, (10, 52 + 20 * i), cv2.FONT_HERSHEY_SIMPLEX,
+                    scale, line_color, 1)
+
+def render_panel(height, lines):
+    """Draw the 'split' layout side panel; the top BANNER_HEIGHT rows are left for the banner"""
+    panel = np.zeros((height, PANEL_WIDTH, 3), dtype=np.uint8)
+    draw_metrics(panel, lines, 0.45)
+    return panel
+
+def live_monitoring(layout='split'):
+    """Run the webcam fatigue monitor until 'q' is pressed or the window is closed.
     
-    vision_text = ax2.text(0.05, 0.65, "", transform=ax2.transAxes, fontsize=10,
-                          verticalalignment='top', fontfamily='monospace')
+    layout: 'split' shows the metrics on a side panel, 'simple' overlays them
+    on the camera frame.
+    """
+    if layout not in ('split', 'simple'):
+        raise ValueError(f"Unknown layout: {layout!r}")
+    model = load_model()
+    cap = open_camera()
     
-    other_text = ax2.text(0.05, 0.35, "", transform=ax2.transAxes, fontsize=10,
-                         verticalalignment='top', fontfamily='monospace')
+    physio = PhysioScore()
+    fatigue_calc = FatigueCalculator()
     
-    frame_text = ax2.text(0.05, 0.15, "", transform=ax2.transAxes, fontsize=9,
-                         verticalalignment='top', fontfamily='monospace', style='italic')
+    # OpenCV window - metrics are drawn straight onto the BGR frame
+    cv2.namedWindow(WINDOW_NAME, cv2.WINDOW_NORMAL)
     
-    # Alert message (centered and prominent)
-    alert_text = ax2.text(0.5, 0.92, "", transform=ax2.transAxes, fontsize=13, 
-                         weight='bold', ha='center', va='top', wrap=True)
+    # Capture, inference and display/scoring run in parallel, connected by
+    # small bounded queues, so the camera, GPU and UI overlap instead of
+    # taking turns.
+    stop_event = threading.Event()
+    cap_q = queue.Queue(maxsize=2)
+    res_q = queue.Queue(maxsize=2)
     
-    try:
-        frame_count = 0
-        while plt.fignum_exists(fig.number):
+    def capture_loop():
+        next_tick = time.perf_counter()
+        while not stop_event.is_set():
             ret, frame = cap.read()
             if not ret:
+                print("Failed to grab frame")
+                stop_event.set()
                 break
+            put_latest(cap_q, frame)
             
-            # Run YOLO inference
-            results = model(frame, conf=0.4)
-            annotated_frame = results[0].plot()
-            
-            # Extract detections
-            eye_closed, yawning, droopy_eyelids, droopy_face, detected_classes = extract_detections(results)
-            
-            # Update physiological scores
-            physio.update_vision_metrics(eye_closed, yawning, droopy_eyelids, droopy_face)
-            physio_scores = physio.get_physio_scores()
-            
-            # Calculate fatigue level
-            level, score, alert_msg = fatigue_calc.calculate_fatigue_level(physio_scores, frame_count)
-
-            # Update display
-            rgb_frame = cv2.cvtColor(annotated_frame, cv2.COLOR_BGR2RGB)
-            img_display.set_data(rgb_frame)
-            
-            # SPLIT TEXT INTO MULTIPLE SECTIONS - NO OVERLAP
-            status_str = f"FATIGUE LEVEL: {level}\nSCORE: {score}/100"
-            status_text.set_text(status_str)
+            # Pace to TARGET_FPS: only sleep for what is left of this frame's time slot
+            next_tick += 1 / TARGET_FPS
+            delay = next_tick - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_tick = time.perf_counter()  # running behind - don't try to catch up
+    
+    def inference_loop():
+        try:
+            frames = []
+            frame_count = 0
+            prev_small = None
+            batch_motion = 0.0
+            last_infer_frame = 0
+            last_result = None
+            while not stop_event.is_set():
+                try:
+                    frame = cap_q.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                
+                # Cheap motion estimate against the previous frame on a thumbnail
+                small = cv2.resize(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY), MOTION_SIZE)
+                if prev_small is not None:
+                    batch_motion = max(batch_motion, cv2.absdiff(small, prev_small).mean())
+                prev_small = small
+                
+                frames.append(frame)
+                if len(frames) < FRAME_BATCH:
+                    continue
+                
+                # Skip YOLO for a still batch and reuse the last result - the
+                # scores keep advancing with it - but never for longer than
+                # MOTION_MAX_SKIP frames
+                if (last_result is not None and batch_motion < MOTION_THRESHOLD
+                        and frame_count - last_infer_frame < MOTION_MAX_SKIP):
+                    results = [last_result] * FRAME_BATCH
+                else:
+                    # Run YOLO inference on the whole batch
+                    with torch.inference_mode():
+                        results = model(frames, **PREDICT_KWARGS)
+                    last_result = results[-1]
+                    last_infer_frame = frame_count
+                frame_count += FRAME_BATCH
+                batch_motion = 0.0
+                
+                # Block rather than drop here, so every inferred frame reaches the PERCLOS window
+                while not stop_event.is_set():
+                    try:
+                        res_q.put((frames, results), timeout=0.1)
+                        break
+                    except queue.Full:
+                        pass
+                frames = []
+        except Exception as e:
+            print(f"Inference error: {e}")
+            stop_event.set()
+    
+    capture_thread = threading.Thread(target=capture_loop, daemon=True)
+    inference_thread = threading.Thread(target=inference_loop, daemon=True)
+    
+    try:
+        frame_count = 0
+        lines = None
+        lines_level = None
+        lines_frame = 0
+        panel = None
+        banner = None
+        banner_key = None
+        capture_thread.start()
+        inference_thread.start()
+        while not stop_event.is_set():
+            try:
+                frames, results = res_q.get(timeout=0.05)
+            except queue.Empty:
+                # Nothing new yet - keep the window responsive
+                if cv2.waitKey(1) & 0xFF == ord('q'):
+                    break
+                continue
             
-            vision_str = f"""VISION FACTORS:
-PERCLOS: {physio_scores['perclos']:.3f}
-FOM: {physio_scores['fom']:.3f}
-Droopy Eyelids: {physio_scores['droopy_eyelids_frequency']:.3f}
-Eye Closure: {physio_scores['continuous_closure_sec']:.1f}s"""
-            vision_text.set_text(vision_str)
+            # Update scores once per frame, in capture order, so the PERCLOS window stays correct
+            for result in results:
+                eye_closed, yawning, droopy_eyelids, droopy_face = extract_detections(result)
+                
+                # Update physiological scores
+                physio.update_vision_metrics(eye_closed, yawning, droopy_eyelids, droopy_face)
+                physio_scores = physio.get_physio_scores()
+                
+                # Calculate fatigue level
+                level, score, alert_msg = fatigue_calc.calculate_fatigue_level(physio_scores, frame_count)
+                frame_count += 1
             
-            other_str = f"""OTHER FACTORS:
-Reaction Time: 0.85
-Voice Patterns: 0.90
-History: 0.80
-Sleep: 6.5 hours
-Alerts: {fatigue_calc.previous_alerts_count}"""
-            other_text.set_text(other_str)
+            # Only the latest frame of the batch is rendered
+            annotated_frame = draw_boxes(frames[-1], results[-1])
             
-            frame_str = f"Frame: {frame_count}"
-            frame_text.set_text(frame_str)
+            # Nobody can read text changing 30 times a second: reformat the
+            # metrics every METRICS_EVERY frames, or straight away when the
+            # level changes, and reuse them for the frames in between
+            refresh = (lines is None or level != lines_level
+                       or frame_count - lines_frame >= METRICS_EVERY)
+            if refresh:
+                lines = format_metrics(level, score, physio_scores,
+                                       fatigue_calc.previous_alerts_count, frame_count)
+                lines_level = level
+                lines_frame = frame_count
+                if layout == 'split':
+                    panel = render_panel(annotated_frame.shape[0], lines)
             
-            # Alert message (shorter to prevent overlap)
-            short_alert = alert_msg
-            if len(alert_msg) > 50:
-                short_alert = alert_msg[:47] + "..."
-            alert_text.set_text(short_alert)
+            # The banner only changes with the level or its message
+            if (level, alert_msg) != banner_key:
+                width = PANEL_WIDTH if layout == 'split' else annotated_frame.shape[1]
+                banner = render_banner(width, level, alert_msg)
+                banner_key = (level, alert_msg)
+                refresh = True
             
-            # Update alert colors
-            if level == "HIGH FATIGUE":
-                alert_text.set_color('red')
-                ax2.set_facecolor('#FFE6E6')
-                status_text.set_color('red')
-            elif level == "EARLY FATIGUE":
-                alert_text.set_color('orange')
-                ax2.set_facecolor('#FFF4E6')
-                status_text.set_color('orange')
+            if layout == 'split':
+                if refresh:
+                    panel[:BANNER_HEIGHT] = banner
+                annotated_frame = np.hstack((annotated_frame, panel))
             else:
-                alert_text.set_color('green')
-                ax2.set_facecolor('#E6FFE6')
-                status_text.set_color('green')
+                # A few putText calls on the frame are cheaper than masking a
+                # cached frame-sized overlay onto it
+                annotated_frame[:BANNER_HEIGHT] = banner
+                draw_metrics(annotated_frame, lines, 0.5)
             
-            fig.canvas.draw()
-            fig.canvas.flush_events()
+            cv2.imshow(WINDOW_NAME, annotated_frame)
             
-            frame_count += 1
-            time.sleep(0.03)
+            # Pump window events; 'q' or closing the window stops monitoring
+            if cv2.waitKey(1) & 0xFF == ord('q'):
+                break
+            if cv2.getWindowProperty(WINDOW_NAME, cv2.WND_PROP_VISIBLE) < 1:
+                break
             
     except Exception as e:
         print(f"Error: {e}")
     finally:
-        plt.ioff()
+        # Stop the workers before releasing the camera they read from
+        stop_event.set()
+        for thread in (capture_thread, inference_thread):
+            if thread.is_alive():
+                thread.join(timeout=2.0)
         cap.release()
-        plt.close()
+        cv2.destroyAllWindows()
         print("Monitoring stopped")
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
     live_monitoring()
\ No newline at end of file